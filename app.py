@@ -1,14 +1,16 @@
 import streamlit as st
 import pandas as pd
-import boto3
 import os
-import altair as alt
-import seaborn as sns
-import matplotlib.pyplot as plt
-import io
+import duckdb
 import pathlib
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.fs as pafs
+import pyarrow.parquet as pq
 from dotenv import load_dotenv
-from botocore.exceptions import BotoCoreError, ClientError, NoCredentialsError
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 
 # Charger les variables du fichier .env (utile en local)
 load_dotenv()
@@ -53,25 +55,115 @@ st.markdown("""
 # ==============
 # CONFIG AWS / SNAPSHOT
 # ==============
-s3 = boto3.client("s3")
 BUCKET = os.getenv("AIRFLOW_S3_BUCKET", "fraud-detection-loicvalentini")
 KEY = "reports/full/scored_payments.parquet"
 
 # Snapshot local pour fallback (à ajouter dans ton repo)
 SNAPSHOT_PATH = pathlib.Path("data/scored_payments.parquet")
 
+# Cache disque au format Arrow IPC (lu en mmap, sans décodage parquet) + ETag S3 associé
+ARROW_CACHE_PATH = pathlib.Path(tempfile.gettempdir()) / "scored_payments.arrow"
+ETAG_CACHE_PATH = ARROW_CACHE_PATH.with_suffix(".etag")
+
+# Codes d'État US -> nom complet
+US_STATES = {
+    "AL": "Alabama", "AK": "Alaska", "AZ": "Arizona", "AR": "Arkansas",
+    "CA": "California", "CO": "Colorado", "CT": "Connecticut", "DE": "Delaware",
+    "FL": "Florida", "GA": "Georgia", "HI": "Hawaii", "ID": "Idaho",
+    "IL": "Illinois", "IN": "Indiana", "IA": "Iowa", "KS": "Kansas",
+    "KY": "Kentucky", "LA": "Louisiana", "ME": "Maine", "MD": "Maryland",
+    "MA": "Massachusetts", "MI": "Michigan", "MN": "Minnesota", "MS": "Mississippi",
+    "MO": "Missouri", "MT": "Montana", "NE": "Nebraska", "NV": "Nevada",
+    "NH": "New Hampshire", "NJ": "New Jersey", "NM": "New Mexico", "NY": "New York",
+    "NC": "North Carolina", "ND": "North Dakota", "OH": "Ohio", "OK": "Oklahoma",
+    "OR": "Oregon", "PA": "Pennsylvania", "RI": "Rhode Island", "SC": "South Carolina",
+    "SD": "South Dakota", "TN": "Tennessee", "TX": "Texas", "UT": "Utah",
+    "VT": "Vermont", "VA": "Virginia", "WA": "Washington", "WV": "West Virginia",
+    "WI": "Wisconsin", "WY": "Wyoming"
+}
+
+
+def read_parquet(source, filesystem=None):
+    """
+    Lit le fichier parquet complet : l'export CSV des fraudes reprend toutes ses colonnes,
+    aucune projection n'est donc appliquée.
+    pre_buffer regroupe les plages d'octets des colonnes en requêtes concurrentes
+    (utile sur S3, où chaque lecture paie la latence réseau).
+    """
+    parquet_file = pq.ParquetFile(source, filesystem=filesystem, pre_buffer=True)
+    return parquet_file.read(use_threads=True)
+
+
+def write_atomically(path, write):
+    """
+    Écrit `path` via un fichier temporaire unique du même dossier, puis os.replace.
+    Deux processus (réplicas, plusieurs `streamlit run`) ne partagent jamais le même
+    fichier temporaire, et aucun lecteur ne voit de fichier à moitié écrit.
+    """
+    with tempfile.NamedTemporaryFile(dir=path.parent, prefix=f"{path.name}.", suffix=".tmp", delete=False) as tmp:
+        tmp_path = pathlib.Path(tmp.name)
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
 
-@st.cache_data(show_spinner="Chargement des données de transactions...")
-def load_data():
+def write_ipc(path, table):
     """
-    1️⃣ Essaie de charger les données depuis S3 (source 'prod').
+    Écrit la table au format Arrow IPC (fichier).
+    """
+    with pa.OSFile(str(path), "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+
+
+def read_s3_table():
+    """
+    Retourne le parquet S3 sous forme de table Arrow, avec son ETag.
+    Le fichier n'est re-téléchargé que si son ETag S3 a changé ; sinon la copie
+    Arrow IPC locale est simplement mappée en mémoire.
+    """
+    import boto3  # import différé : uniquement quand le cache est froid
+
+    s3 = boto3.client("s3")
+    etag = s3.head_object(Bucket=BUCKET, Key=KEY)["ETag"]
+
+    if ARROW_CACHE_PATH.exists() and ETAG_CACHE_PATH.exists() and ETAG_CACHE_PATH.read_text() == etag:
+        try:
+            with pa.memory_map(str(ARROW_CACHE_PATH)) as source:
+                return pa.ipc.open_file(source).read_all(), etag
+        except (pa.ArrowInvalid, OSError):
+            # Cache local illisible (tronqué, footer corrompu…) : on le supprime et on re-télécharge
+            ARROW_CACHE_PATH.unlink(missing_ok=True)
+            ETAG_CACHE_PATH.unlink(missing_ok=True)
+
+    # Lecture directe par le filesystem S3 d'Arrow (lectures par plages, sans copie BytesIO)
+    fs, path = pafs.FileSystem.from_uri(f"s3://{BUCKET}/{KEY}")
+    table = read_parquet(path, filesystem=fs)
+
+    # L'ancien ETag est retiré d'abord : tant que le nouveau n'est pas écrit, le cache ne matche pas
+    ETAG_CACHE_PATH.unlink(missing_ok=True)
+    write_atomically(ARROW_CACHE_PATH, lambda path: write_ipc(path, table))
+    write_atomically(ETAG_CACHE_PATH, lambda path: path.write_text(etag))
+
+    return table, etag
+
+
+@st.cache_resource(show_spinner="Chargement des données de transactions...")
+def load_table():
+    """
+    1️⃣ Essaie de charger les données depuis S3 (source 'prod'), via le cache Arrow local.
     2️⃣ En cas d'échec (quota, creds, réseau…), bascule sur un snapshot local.
     3️⃣ Ne conserve que les transactions après l'année 2000.
+    La table Arrow reste en mémoire entre les reruns (pas de pickle) : c'est la source
+    partagée des KPIs et du DataFrame pandas.
+    Retourne (table, version) : la version (ETag S3, ou date du snapshot) sert de clé aux caches.
     """
-    # --- Lecture des données ---
+    from botocore.exceptions import BotoCoreError, ClientError, NoCredentialsError
+
     try:
-        obj = s3.get_object(Bucket=BUCKET, Key=KEY)
-        df = pd.read_parquet(io.BytesIO(obj["Body"].read()))
+        table, version = read_s3_table()
 
     except (ClientError, BotoCoreError, NoCredentialsError, OSError) as e:
         st.warning("⚠️ Impossible de récupérer les données sur S3. Utilisation d’un snapshot local.")
@@ -85,59 +177,243 @@ def load_data():
             raise
 
         # Lecture du snapshot local (parquet ou csv)
+        version = f"snapshot-{SNAPSHOT_PATH.stat().st_mtime_ns}"
         if SNAPSHOT_PATH.suffix == ".parquet":
-            df = pd.read_parquet(SNAPSHOT_PATH)
+            table = read_parquet(str(SNAPSHOT_PATH))
         else:
-            df = pd.read_csv(SNAPSHOT_PATH)
+            table = pa.Table.from_pandas(pd.read_csv(SNAPSHOT_PATH), preserve_index=False)
+
+    # --- Filtre : ne garder que les années > 2000 (noyau Arrow, sans passer par pandas) ---
+    if "trans_year" in table.column_names:
+        table = table.filter(pc.greater(table["trans_year"], 2000))  # change en >= 2000 si besoin
+
+    return table, version
 
-    # --- Filtre : ne garder que les années > 2000 ---
-    if "trans_year" in df.columns:
-        df = df[df["trans_year"] > 2000].copy()  # change en >= 2000 si besoin
+
+@st.cache_data(show_spinner=False)
+def prepared_frame(_table, data_key):
+    """
+    Convertit la table Arrow (déjà filtrée) en DataFrame pour les graphiques et reconstruit event_time.
+    Mis en cache par version des données (data_key) : rien n'est recalculé tant que S3 ne publie
+    pas un nouvel objet.
+    """
+    # La table est partagée via cache_resource : pas de self_destruct ici.
+    # Les colonnes texte (state, category) arrivent directement en Categorical.
+    df = _table.to_pandas(split_blocks=True, strings_to_categorical=True)
+
+    # --- Prédiction sur 1 octet ---
+    df["prediction"] = df["prediction"].astype("int8")
+
+    # --- Colonne datetime complète (année-mois-jour-heure-minute), calculée une fois par chargement ---
+    if {"trans_year", "trans_month", "trans_day", "trans_hour"}.issubset(df.columns):
+        # Assemblage direct à partir des composantes entières (pas de chaînes ni de parsing)
+        parts = df[["trans_year", "trans_month", "trans_day", "trans_hour"]].rename(
+            columns=lambda c: c.removeprefix("trans_")
+        )
+        parts["minute"] = df["trans_minute"] if "trans_minute" in df.columns else 0
+        df["event_time"] = pd.to_datetime(parts, errors="coerce")
+    else:
+        st.warning("⚠️ Colonnes temporelles manquantes. Vérifie ton dataset.")
+        df["event_time"] = pd.NaT
 
     return df
 
 
+# ==============
+# PANNEAUX (fonctions cachées)
+# ==============
+# Chaque panneau est mis en cache séparément : changer la granularité ne recalcule que by_period.
+# Les données (préfixées par _) ne sont pas hachées ; data_key identifie leur version.
+@st.cache_data(show_spinner=False)
+def compute_kpis(_table, data_key):
+    """
+    Calcule les KPIs en un seul passage DuckDB, directement sur la table Arrow (sans copie pandas).
+    Retourne (nb transactions, nb fraudes, taux de fraude, montant total, montant fraudé).
+    """
+    with duckdb.connect() as con:
+        con.register("payments", _table)
+        return con.execute("""
+            SELECT
+                COUNT(*),
+                COALESCE(SUM(prediction), 0),
+                COALESCE(AVG(prediction), 0),
+                COALESCE(SUM(amt), 0),
+                COALESCE(SUM(amt) FILTER (WHERE prediction = 1), 0)
+            FROM payments
+        """).fetchone()
+
+
+@st.cache_data(show_spinner=False)
+def by_period(_df, data_key, granularity):
+    """
+    Taux de fraude (%) par période, selon la granularité choisie.
+    """
+    event_time = _df["event_time"]
+
+    # Arrondis vectorisés : pas d'objets Period ni de callback Python par ligne
+    if granularity == "Heure":
+        period = event_time.dt.floor("h")
+    elif granularity == "Jour":
+        period = event_time.dt.floor("D")
+    elif granularity == "Semaine":
+        # Début de semaine = lundi, comme to_period("W")
+        period = (event_time - pd.to_timedelta(event_time.dt.weekday, unit="D")).dt.floor("D")
+    else:  # "Mois"
+        period = event_time.to_numpy().astype("datetime64[M]").astype("datetime64[ns]")
+
+    # Groupby sur les deux seules colonnes utiles, pas sur tout le DataFrame.
+    # Seules les colonnes encodées (period, fraud_rate en %) sont envoyées au navigateur.
+    return (
+        pd.DataFrame({"period": period, "prediction": _df["prediction"]})
+        .groupby("period", sort=True)["prediction"]
+        .mean()
+        .mul(100)
+        .rename("fraud_rate")
+        .reset_index()
+        .dropna()
+    )
+
+
+def count_fraudes(table, column):
+    """
+    Nombre de fraudes par valeur d'une colonne de la table Arrow, triées par ordre décroissant.
+    Filtrage et comptage par les noyaux C++ d'Arrow (pyarrow.compute.value_counts).
+    """
+    fraudes = pc.drop_null(table[column].filter(pc.equal(table["prediction"], 1)))
+    values, counts = pc.value_counts(fraudes).flatten()
+    return pd.DataFrame({
+        "value": values.to_numpy(zero_copy_only=False),
+        "count": counts.to_numpy(),
+    }).sort_values("count", ascending=False, ignore_index=True)
+
+
+@st.cache_data(show_spinner=False)
+def by_category(_table, data_key):
+    """
+    Nombre de fraudes par catégorie.
+    """
+    fraude_cat = count_fraudes(_table, "category")
+    fraude_cat.columns = ["category", "count"]
+    return fraude_cat
+
+
+@st.cache_data(show_spinner=False)
+def by_state(_table, data_key):
+    """
+    Nombre de fraudes par État (nom complet).
+    """
+    fraudes_par_state = count_fraudes(_table, "state")
+    # Traduction des seuls codes d'État comptés (pas de map sur N lignes)
+    fraudes_par_state["value"] = fraudes_par_state["value"].map(US_STATES).fillna(fraudes_par_state["value"])
+    fraudes_par_state.columns = ["État", "Nombre de fraudes"]
+    return fraudes_par_state
+
+
+@st.cache_data(show_spinner=False)
+def build_csv(_fraude_details, cache_key):
+    """
+    Sérialise les fraudes en CSV une seule fois par version des données.
+    Le DataFrame (préfixé par _) n'est pas haché : seule cache_key sert de clé.
+    """
+    return _fraude_details.to_csv(index=False).encode("utf-8")
+
+
+# ==============
+# SPECS VEGA-LITE
+# ==============
+# Specs écrites à la main : pas de reconstruction d'objets Altair à chaque rerun.
+LINE_SPEC = {
+    "mark": {"type": "line", "point": True},
+    "encoding": {
+        "x": {"field": "period", "type": "temporal"},
+        "y": {"field": "fraud_rate", "type": "quantitative", "title": "Taux fraude (%)"},
+        "tooltip": [
+            {"field": "period", "type": "temporal"},
+            {"field": "fraud_rate", "type": "quantitative", "format": ".2f"},
+        ],
+    },
+    "width": 700,
+    "height": 400,
+}
+
+# Camembert rendu par le navigateur (part de chaque catégorie calculée côté Vega)
+CATEGORY_PIE_SPEC = {
+    "title": "Répartition des fraudes par catégorie",
+    "transform": [
+        {"joinaggregate": [{"op": "sum", "field": "count", "as": "total"}]},
+        {"calculate": "datum.count / datum.total", "as": "share"},
+    ],
+    "mark": {"type": "arc", "innerRadius": 0},
+    "encoding": {
+        "theta": {"field": "count", "type": "quantitative"},
+        "color": {"field": "category", "type": "nominal", "title": "Catégorie"},
+        "tooltip": [
+            {"field": "category", "type": "nominal"},
+            {"field": "count", "type": "quantitative"},
+            {"field": "share", "type": "quantitative", "format": ".1%"},
+        ],
+    },
+    "view": {"stroke": None},
+}
+
+STATE_BAR_SPEC = {
+    "title": "Fraudes par État",
+    "mark": {"type": "bar", "color": "red"},
+    "encoding": {
+        "x": {"field": "Nombre de fraudes", "type": "quantitative"},
+        "y": {"field": "État", "type": "nominal", "sort": "-x"},
+        "tooltip": [
+            {"field": "État", "type": "nominal"},
+            {"field": "Nombre de fraudes", "type": "quantitative"},
+        ],
+    },
+    "width": 350,
+    "height": 350,
+}
+
+
 # ==============
 # HEADER + DATA
 # ==============
 st.title("🕵️ Rapport Fraude Global")
 st.markdown("Un aperçu complet des transactions scorées avec détection de fraude.")
 
-# Chargement initial
-df = load_data()
-
 if st.button("🔄 Recharger les données"):
+    st.cache_resource.clear()
     st.cache_data.clear()
-    df = load_data()
+
+# Chargement : data_key (ETag S3) sert de clé légère à tous les caches en aval
+table, data_key = load_table()
+df = prepared_frame(table, data_key)
 
 # ==============
 # KPIs
 # ==============
-fraud_amount = df.loc[df["prediction"] == 1, "amt"].sum()
+n_transactions, n_fraudes, fraud_rate, total_amount, fraud_amount = compute_kpis(table, data_key)
 
 col1, col2, col3, col4, col5 = st.columns(5)
 with col1:
     st.markdown(
         f"<div class='metric-card'><div class='metric-title'>Transactions cumulées</div>"
-        f"<div class='metric-value'>{len(df):,}</div></div>",
+        f"<div class='metric-value'>{n_transactions:,}</div></div>",
         unsafe_allow_html=True
     )
 with col2:
     st.markdown(
         f"<div class='metric-card'><div class='metric-title'>Fraudes cumulées</div>"
-        f"<div class='metric-value'>{df['prediction'].sum():,}</div></div>",
+        f"<div class='metric-value'>{n_fraudes:,}</div></div>",
         unsafe_allow_html=True
     )
 with col3:
     st.markdown(
         f"<div class='metric-card'><div class='metric-title'>Taux de fraude global</div>"
-        f"<div class='metric-value'>{100*df['prediction'].mean():.2f}%</div></div>",
+        f"<div class='metric-value'>{100*fraud_rate:.2f}%</div></div>",
         unsafe_allow_html=True
     )
 with col4:
     st.markdown(
         f"<div class='metric-card'><div class='metric-title'>Montant total analysé (€)</div>"
-        f"<div class='metric-value'>{df['amt'].sum():,.0f}</div></div>",
+        f"<div class='metric-value'>{total_amount:,.0f}</div></div>",
         unsafe_allow_html=True
     )
 with col5:
@@ -156,44 +432,16 @@ st.subheader("📅 Évolution du taux de fraude")
 
 granularity = st.radio("Granularité :", ["Heure", "Jour", "Semaine", "Mois"], horizontal=True)
 
-# Créer une colonne datetime complète (année-mois-jour-heure-minute)
-if {"trans_year", "trans_month", "trans_day", "trans_hour"}.issubset(df.columns):
-    df["event_time"] = pd.to_datetime(
-        df["trans_year"].astype(str) + "-" +
-        df["trans_month"].astype(str).str.zfill(2) + "-" +
-        df["trans_day"].astype(str).str.zfill(2) + " " +
-        df["trans_hour"].astype(str).str.zfill(2) + ":" +
-        df.get("trans_minute", 0).astype(str).str.zfill(2),
-        errors="coerce"
-    )
-else:
-    st.warning("⚠️ Colonnes temporelles manquantes. Vérifie ton dataset.")
-    df["event_time"] = pd.NaT
-
-# Granularité
-if granularity == "Heure":
-    df["period"] = df["event_time"].dt.to_period("H").apply(lambda r: r.start_time)
-elif granularity == "Jour":
-    df["period"] = df["event_time"].dt.date
-elif granularity == "Semaine":
-    df["period"] = df["event_time"].dt.to_period("W").apply(lambda r: r.start_time)
-elif granularity == "Mois":
-    df["period"] = df["event_time"].dt.to_period("M").apply(lambda r: r.start_time)
-
-fraude_by_period = (
-    df.groupby("period")["prediction"].mean().reset_index().dropna()
-)
-
-# Convertir en %
-fraude_by_period["fraud_rate"] = fraude_by_period["prediction"] * 100
+# Les trois agrégations sont indépendantes : calculées en parallèle (les noyaux pandas/NumPy
+# relâchent le GIL). Le contexte Streamlit est propagé aux threads pour les fonctions cachées.
+ctx = get_script_run_ctx()
+with ThreadPoolExecutor(max_workers=3, initializer=add_script_run_ctx, initargs=(None, ctx)) as executor:
+    f_period = executor.submit(by_period, df, data_key, granularity)
+    f_cat = executor.submit(by_category, table, data_key)
+    f_state = executor.submit(by_state, table, data_key)
+    fraude_by_period, fraude_cat, fraudes_par_state = f_period.result(), f_cat.result(), f_state.result()
 
-chart = alt.Chart(fraude_by_period).mark_line(point=True).encode(
-    x="period:T",
-    y=alt.Y("fraud_rate:Q", title="Taux fraude (%)"),
-    tooltip=["period", alt.Tooltip("fraud_rate:Q", format=".2f")]
-).properties(width=700, height=400)
-
-st.altair_chart(chart, use_container_width=True)
+st.vega_lite_chart(fraude_by_period, LINE_SPEC, use_container_width=True)
 
 # ==========
 # VISUELS ANALYTIQUES
@@ -204,61 +452,35 @@ col1, col2 = st.columns(2)
 
 # Pie chart par catégorie
 with col1:
-    fraude_cat = df[df["prediction"] == 1]["category"].value_counts().reset_index()
-    fraude_cat.columns = ["category", "count"]
-
-    fig1, ax1 = plt.subplots()
-    ax1.pie(fraude_cat["count"], labels=fraude_cat["category"], autopct="%1.1f%%")
-    ax1.set_title("Répartition des fraudes par catégorie")
-    st.pyplot(fig1)
+    st.vega_lite_chart(fraude_cat, CATEGORY_PIE_SPEC, use_container_width=True)
 
 # Bar chart par état
 with col2:
-    US_STATES = {
-        "AL": "Alabama", "AK": "Alaska", "AZ": "Arizona", "AR": "Arkansas",
-        "CA": "California", "CO": "Colorado", "CT": "Connecticut", "DE": "Delaware",
-        "FL": "Florida", "GA": "Georgia", "HI": "Hawaii", "ID": "Idaho",
-        "IL": "Illinois", "IN": "Indiana", "IA": "Iowa", "KS": "Kansas",
-        "KY": "Kentucky", "LA": "Louisiana", "ME": "Maine", "MD": "Maryland",
-        "MA": "Massachusetts", "MI": "Michigan", "MN": "Minnesota", "MS": "Mississippi",
-        "MO": "Missouri", "MT": "Montana", "NE": "Nebraska", "NV": "Nevada",
-        "NH": "New Hampshire", "NJ": "New Jersey", "NM": "New Mexico", "NY": "New York",
-        "NC": "North Carolina", "ND": "North Dakota", "OH": "Ohio", "OK": "Oklahoma",
-        "OR": "Oregon", "PA": "Pennsylvania", "RI": "Rhode Island", "SC": "South Carolina",
-        "SD": "South Dakota", "TN": "Tennessee", "TX": "Texas", "UT": "Utah",
-        "VT": "Vermont", "VA": "Virginia", "WA": "Washington", "WV": "West Virginia",
-        "WI": "Wisconsin", "WY": "Wyoming"
-    }
-
-    df["state_full"] = df["state"].map(US_STATES).fillna(df["state"])
-
-    fraudes_par_state = df[df["prediction"] == 1]["state_full"].value_counts().reset_index()
-    fraudes_par_state.columns = ["État", "Nombre de fraudes"]
-
-    chart_state = alt.Chart(fraudes_par_state).mark_bar(color="red").encode(
-        x="Nombre de fraudes:Q",
-        y=alt.Y("État:N", sort="-x"),
-        tooltip=["État", "Nombre de fraudes"]
-    ).properties(width=350, height=350, title="Fraudes par État")
-
-    st.altair_chart(chart_state, use_container_width=True)
+    st.vega_lite_chart(fraudes_par_state, STATE_BAR_SPEC, use_container_width=True)
 
 # ==========
 # DATASET COMPLET
 # ==========
-df_display = df.rename(columns={"unnamed_0": "trans_number"})
-df_display["date"] = df_display["event_time"].dt.strftime("%Y-%m-%d %H:%M")
-
-cols_order = ["trans_number", "date", "amt", "probability", "state_full"]
-other_cols = [c for c in df_display.columns if c not in cols_order]
-df_display = df_display[cols_order + other_cols]
+# Construction sur les seules lignes frauduleuses (pas de copie du DataFrame complet).
+# Toutes les colonnes sources sont conservées ; seul event_time (interne, remplacé par date) est exclu.
+fraude_mask = df["prediction"].to_numpy(dtype=bool)
+cols_order = ["unnamed_0", "amt", "probability"]
+other_cols = [c for c in df.columns if c not in cols_order and c != "event_time"]
+fraude_details = df.loc[fraude_mask, cols_order + other_cols].rename(columns={"unnamed_0": "trans_number"})
+# Renommage des ~50 catégories plutôt qu'un map ligne à ligne
+# (les codes absents du dict sont conservés tels quels, les clés inutilisées ignorées)
+fraude_details.insert(3, "state_full", fraude_details["state"].cat.rename_categories(US_STATES))
+# Formatage des dates par le noyau C++ d'Arrow (positionnel : on repasse par un tableau NumPy)
+fraude_dates = pa.Array.from_pandas(df.loc[fraude_mask, "event_time"])
+fraude_details.insert(
+    1, "date", pc.strftime(fraude_dates, format="%Y-%m-%d %H:%M").to_numpy(zero_copy_only=False)
+)
 
 st.subheader("📂 Détails des fraudes détectées")
-fraude_details = df_display[df_display["prediction"] == 1]
 st.dataframe(fraude_details)
 
 # Bouton téléchargement
-csv = fraude_details.to_csv(index=False).encode("utf-8")
+csv = build_csv(fraude_details, data_key)
 st.download_button("⬇️ Télécharger CSV complet", data=csv, file_name="fraudes.csv", mime="text/csv")
 
 # ==========